@@ -0,0 +1,311 @@
+# Suíte de benchmark de regressão para as estratégias de reserva de teste.py.
+# Roda um subconjunto da matriz versão x k x isolamento com aquecimento e repetições,
+# usando tempos de reserva reduzidos, salva o resultado como baseline versionada e
+# compara vazão e p99 da latência com uma baseline anterior.
+#
+# Exemplo:
+#   python benchmark.py --versoes A B --agentes 2 8 --isolamentos "read committed" --repeticoes 5
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import itertools
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+
+import teste
+
+# Versão do formato do arquivo de baseline (incrementar se os campos mudarem)
+FORMATO_BASELINE = 1
+
+def medir_celula(versao, num_agentes, isolation_level, aquecimento, repeticoes, verboso=False):
+    """
+    Executa uma célula da matriz: descarta 'aquecimento' execuções e retorna as amostras
+    de vazão (reservas/s), p99 da latência por reserva (s) e duração (s) de cada repetição.
+    """
+    amostras = {'vazao': [], 'p99': [], 'duracao': []}
+    for i in range(aquecimento + repeticoes):
+        # As mensagens dos agentes são descartadas, a não ser no modo verboso
+        saida = contextlib.nullcontext() if verboso else contextlib.redirect_stdout(io.StringIO())
+        with saida:
+            teste.limpar_assentos()
+            metrics = teste.executar_reservas(versao=versao, num_agentes=num_agentes, isolation_level=isolation_level,
+                                              coletar_armazenamento=False)
+        if i < aquecimento:
+            continue
+        latencias = metrics['latencias_por_reserva']
+        amostras['vazao'].append(len(latencias) / metrics['duracao'])
+        amostras['p99'].append(float(np.percentile(latencias, 99)) if latencias else None)
+        amostras['duracao'].append(metrics['duracao'])
+    return amostras
+
+def p_valor_minimo(n_a, n_b):
+    """
+    Menor p-valor que o teste de permutação bilateral consegue atingir com amostras de
+    tamanhos n_a e n_b: só a divisão observada (e, com tamanhos iguais, a espelhada)
+    é tão extrema quanto ela entre as C(n_a + n_b, n_a) divisões possíveis.
+    """
+    return (2 if n_a == n_b else 1) / math.comb(n_a + n_b, n_a)
+
+def teste_permutacao(amostras_a, amostras_b, permutacoes=10000, seed=0):
+    """
+    Teste de permutação bilateral para a diferença de médias entre duas amostras.
+    Retorna o p-valor; usado no lugar de um teste t para não depender do scipy.
+    Quando há no máximo 'permutacoes' divisões possíveis, o teste é exato (enumera todas);
+    senão, usa 'permutacoes' divisões aleatórias.
+    """
+    a = np.asarray(amostras_a, dtype=float)
+    b = np.asarray(amostras_b, dtype=float)
+    observada = abs(a.mean() - b.mean())
+    todas = np.concatenate([a, b])
+    # Tolerância para empates de ponto flutuante entre divisões equivalentes
+    limite = observada - 1e-12 * max(1.0, observada)
+    if math.comb(len(todas), len(a)) <= permutacoes:
+        total = 0
+        extremas = 0
+        for indices in itertools.combinations(range(len(todas)), len(a)):
+            mascara = np.zeros(len(todas), dtype=bool)
+            mascara[list(indices)] = True
+            total += 1
+            if abs(todas[mascara].mean() - todas[~mascara].mean()) >= limite:
+                extremas += 1
+        return extremas / total
+    rng = np.random.default_rng(seed)
+    extremas = 0
+    for _ in range(permutacoes):
+        rng.shuffle(todas)
+        if abs(todas[:len(a)].mean() - todas[len(a):].mean()) >= limite:
+            extremas += 1
+    return (extremas + 1) / (permutacoes + 1)
+
+def comparar_baselines(anterior, atual, alpha, limiar):
+    """
+    Compara as células presentes nas duas baselines e retorna (regressões, inconclusivas,
+    número de comparações feitas).
+    Regressão: queda de vazão ou aumento do p99 com p-valor < alpha e variação relativa > limiar.
+    Inconclusiva: comparação em que, pelo número de amostras, o teste nunca atingiria p < alpha.
+    """
+    celulas_anteriores = {(c['perfil'], c['versao'], c['agentes'], c['isolamento']): c for c in anterior['celulas']}
+    perfis_anteriores = anterior.get('parametros', {}).get('perfis', {})
+    perfis_atuais = atual.get('parametros', {}).get('perfis', {})
+    regressoes = []
+    inconclusivas = []
+    comparadas = 0
+    print(f"\n--- Comparação com a baseline v{anterior.get('versao_baseline')} ---")
+    for celula in atual['celulas']:
+        chave = (celula['perfil'], celula['versao'], celula['agentes'], celula['isolamento'])
+        base = celulas_anteriores.get(chave)
+        if base is None:
+            print(f"Célula {chave}: ausente na baseline anterior, ignorada.")
+            continue
+        # Mesmo nome de perfil com configuração diferente (ex: perfil editado) não é comparável
+        config_anterior = perfis_anteriores.get(celula['perfil'])
+        config_atual = perfis_atuais.get(celula['perfil'])
+        if config_anterior is not None and config_atual is not None and config_anterior != config_atual:
+            print(f"AVISO: célula {chave} ignorada: o perfil '{celula['perfil']}' tem configuração diferente na baseline anterior.")
+            continue
+        # Para a vazão, piorar é diminuir; para o p99, é aumentar
+        for metrica, sinal_piora in (('vazao', -1), ('p99', 1)):
+            antes = [x for x in base[metrica] if x is not None]
+            depois = [x for x in celula[metrica] if x is not None]
+            if len(antes) < 2 or len(depois) < 2 or p_valor_minimo(len(antes), len(depois)) >= alpha:
+                print(f"Célula {chave} [{metrica}]: INCONCLUSIVA, {len(antes)} x {len(depois)} amostras "
+                      f"não permitem p < {alpha}.")
+                inconclusivas.append({'celula': chave, 'metrica': metrica})
+                continue
+            media_antes = float(np.mean(antes))
+            media_depois = float(np.mean(depois))
+            variacao = (media_depois - media_antes) / media_antes if media_antes else 0.0
+            p_valor = teste_permutacao(antes, depois)
+            comparadas += 1
+            regressao = p_valor < alpha and variacao * sinal_piora > limiar
+            status = "REGRESSÃO" if regressao else "ok"
+            print(f"Célula {chave} [{metrica}]: {media_antes:.4f} -> {media_depois:.4f} ({variacao:+.1%}, p={p_valor:.4f}) {status}")
+            if regressao:
+                regressoes.append({'celula': chave, 'metrica': metrica, 'variacao': variacao, 'p_valor': p_valor})
+    return regressoes, inconclusivas, comparadas
+
+def herdar_celulas(anterior, atual):
+    """
+    Copia para a baseline atual as células da anterior que não foram medidas nesta execução,
+    para que uma execução parcial (ex: só uma versão) não apague a referência das demais.
+    Células cujo perfil tem outra configuração na execução atual não são herdadas.
+    Retorna o número de células herdadas.
+    """
+    perfis_anteriores = anterior['parametros']['perfis']
+    perfis_atuais = atual['parametros']['perfis']
+    medidas = {(c['perfil'], c['versao'], c['agentes'], c['isolamento']) for c in atual['celulas']}
+    herdadas = 0
+    for celula in anterior['celulas']:
+        chave = (celula['perfil'], celula['versao'], celula['agentes'], celula['isolamento'])
+        if chave in medidas:
+            continue
+        config_anterior = perfis_anteriores.get(celula['perfil'])
+        if celula['perfil'] in perfis_atuais and perfis_atuais[celula['perfil']] != config_anterior:
+            continue
+        perfis_atuais.setdefault(celula['perfil'], config_anterior)
+        # Guarda a versão em que a célula foi medida de fato
+        atual['celulas'].append({**celula, 'herdada_de': celula.get('herdada_de', anterior['versao_baseline'])})
+        herdadas += 1
+    return herdadas
+
+def listar_baselines(diretorio):
+    """
+    Retorna os caminhos das baselines aceitas do diretório, ordenados pela versão.
+    Execuções rejeitadas (rejeitada_*.json) não entram na lista.
+    """
+    caminhos = glob.glob(os.path.join(diretorio, "baseline_v*.json"))
+    return sorted(caminhos, key=lambda c: int(re.search(r"baseline_v(\d+)\.json$", c).group(1)))
+
+def commit_atual():
+    """
+    Retorna o hash do commit git atual, ou None se não estiver em um repositório.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de regressão das estratégias de reserva de assentos.")
+    parser.add_argument("--versoes", nargs="+", default=["A", "B"], choices=["A", "B", "C"])
+    parser.add_argument("--agentes", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--isolamentos", nargs="+", default=["read committed", "serializable"],
+                        choices=["read committed", "serializable"])
+    parser.add_argument("--perfis", nargs="+", default=[teste.PERFIL_ATIVO['nome']],
+                        help="Perfis de implantação (perfis.json) medidos; cada um gera suas próprias células.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções medidas por célula.")
+    parser.add_argument("--aquecimento", type=int, default=1, help="Execuções descartadas antes das medidas.")
+    parser.add_argument("--tempo-reserva", type=float, default=0.01,
+                        help="Tempo simulado de escolha do assento (o experimento original usa 1s).")
+    parser.add_argument("--pausa-retentativa", type=float, default=0.001)
+    parser.add_argument("--diretorio", default="benchmarks", help="Diretório das baselines versionadas.")
+    parser.add_argument("--comparar-com", help="Baseline usada na comparação (padrão: a baseline aceita mais recente).")
+    parser.add_argument("--promover", action="store_true",
+                        help="Aceita esta execução como nova baseline mesmo com regressões (ex: mudança intencional).")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Nível de significância do teste de permutação.")
+    parser.add_argument("--limiar", type=float, default=0.05, help="Variação relativa mínima para indicar regressão.")
+    parser.add_argument("--verboso", action="store_true", help="Mostra as mensagens dos agentes.")
+    args = parser.parse_args()
+
+    if p_valor_minimo(args.repeticoes, args.repeticoes) >= args.alpha:
+        minimo = next(n for n in itertools.count(2) if p_valor_minimo(n, n) < args.alpha)
+        parser.error(f"--repeticoes {args.repeticoes} não permite p < {args.alpha} no teste de permutação; "
+                     f"use pelo menos {minimo}.")
+
+    os.makedirs(args.diretorio, exist_ok=True)
+    existentes = listar_baselines(args.diretorio)
+    anterior_caminho = args.comparar_com or (existentes[-1] if existentes else None)
+    proxima_versao = int(re.search(r"baseline_v(\d+)\.json$", existentes[-1]).group(1)) + 1 if existentes else 1
+
+    # Verifica a baseline anterior antes de medir: um formato diferente não é comparável
+    anterior = None
+    if anterior_caminho is not None:
+        with open(anterior_caminho, encoding='utf-8') as f:
+            anterior = json.load(f)
+        if anterior.get('formato') != FORMATO_BASELINE:
+            print(f"A baseline '{anterior_caminho}' usa o formato {anterior.get('formato')}, "
+                  f"incompatível com o formato atual ({FORMATO_BASELINE}).")
+            if not args.promover:
+                print("Use --comparar-com com uma baseline compatível ou --promover para iniciar uma nova série.")
+                sys.exit(2)
+            anterior = None
+            anterior_caminho = None
+
+    teste.TEMPO_RESERVA = args.tempo_reserva
+    teste.PAUSA_RETENTATIVA = args.pausa_retentativa
+
+    celulas = []
+    perfis = {}
+    for nome_perfil in args.perfis:
+        perfil = teste.aplicar_perfil(nome_perfil)
+        # O rótulo indica sobrescritas por variáveis de ambiente; a configuração efetiva
+        # (sem a senha) é guardada na baseline para a comparação
+        rotulo = perfil['rotulo']
+        perfis[rotulo] = teste.configuracao_efetiva(perfil)
+        print(f"--- Perfil '{rotulo}' [{perfil['assinatura']}]: verificando e configurando o ambiente do banco de dados ---")
+        if not (teste.criar_banco_oficina4() and teste.criar_tabela_assentos(**teste.CONFIG_TABELA_ASSENTOS)):
+            print("Não foi possível preparar o banco de dados. Abortando benchmark.")
+            sys.exit(2)
+        teste.inicializar_assentos()
+
+        for iso_level in args.isolamentos:
+            for ver in args.versoes:
+                for k in args.agentes:
+                    print(f"\nCélula: Perfil={rotulo}, Versão={ver}, Agentes={k}, Isolamento={iso_level}")
+                    amostras = medir_celula(ver, k, iso_level, args.aquecimento, args.repeticoes, args.verboso)
+                    print(f"  Vazão média: {np.mean(amostras['vazao']):.2f} reservas/s (desvio {np.std(amostras['vazao'], ddof=1):.2f})")
+                    celulas.append({'perfil': rotulo, 'versao': ver, 'agentes': k, 'isolamento': iso_level, **amostras})
+
+    atual = {
+        'formato': FORMATO_BASELINE,
+        'versao_baseline': None, # Definida se a execução for aceita como baseline
+        'criado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'parametros': {
+            'repeticoes': args.repeticoes,
+            'aquecimento': args.aquecimento,
+            'tempo_reserva': args.tempo_reserva,
+            'pausa_retentativa': args.pausa_retentativa,
+            'perfis': perfis,
+            'tabela': teste.CONFIG_TABELA_ASSENTOS
+        },
+        'celulas': celulas
+    }
+
+    regressoes, inconclusivas, comparadas = [], [], 0
+    if anterior is None:
+        print("\nNenhuma baseline anterior para comparar.")
+    else:
+        if anterior.get('parametros', {}).get('tempo_reserva') != args.tempo_reserva:
+            print("AVISO: a baseline anterior usou outro tempo de reserva; a comparação pode não ser válida.")
+        regressoes, inconclusivas, comparadas = comparar_baselines(anterior, atual, args.alpha, args.limiar)
+
+    # Só uma execução sem regressões (ou promovida) vira a baseline das próximas comparações;
+    # as demais ficam guardadas para análise, mas não escondem a regressão na próxima execução.
+    # Sem nenhuma célula comparada, nada garante que a execução não piorou: exige --promover
+    sem_comparacao = anterior is not None and comparadas == 0
+    aceita = args.promover or not (regressoes or inconclusivas or sem_comparacao)
+    if aceita:
+        atual['versao_baseline'] = proxima_versao
+        if anterior is not None and anterior.get('versao_baseline') is not None:
+            if anterior['parametros'].get('tempo_reserva') == args.tempo_reserva:
+                herdadas = herdar_celulas(anterior, atual)
+                if herdadas:
+                    print(f"\n{herdadas} célula(s) não medida(s) nesta execução herdada(s) da baseline v{anterior['versao_baseline']}.")
+            else:
+                print("\nAVISO: células da baseline anterior não herdadas (tempo de reserva diferente).")
+        caminho = os.path.join(args.diretorio, f"baseline_v{proxima_versao}.json")
+    else:
+        atual['comparada_com'] = anterior_caminho
+        carimbo = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        caminho = os.path.join(args.diretorio, f"rejeitada_{carimbo}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(atual, f, indent=2, ensure_ascii=False)
+    if aceita:
+        print(f"\nBaseline v{proxima_versao} salva em '{caminho}'")
+    else:
+        print(f"\nExecução não aceita como baseline; salva em '{caminho}' (use --promover para aceitá-la).")
+
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) significativa(s) detectada(s).")
+        sys.exit(1)
+    if inconclusivas:
+        print(f"\n{len(inconclusivas)} comparação(ões) inconclusiva(s): amostras insuficientes na baseline anterior ou atual.")
+        sys.exit(1)
+    if sem_comparacao:
+        print("\nNenhuma célula pôde ser comparada com a baseline anterior.")
+        if not args.promover:
+            sys.exit(1)
+    elif anterior_caminho is not None:
+        print("\nNenhuma regressão significativa detectada.")
+
+if __name__ == "__main__":
+    main()
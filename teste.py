@@ -1,30 +1,179 @@
 # importando dependências
+import os
+import json
+import hashlib
 import threading
+import queue
 import random
 import time
 import psycopg2
 from psycopg2 import errors # Para capturar erros específicos como deadlock
 import psycopg2.extensions # Para os níveis de isolamento
-
-# --- Configurações do Banco de Dados ---
-DB_CONFIG_ADMIN = {
+from psycopg2 import sql # Para compor o nome do banco definido pelo perfil
+
+# --- Perfis de Implantação ---
+# O perfil define a conexão (host, porta, usuário, senha, bancos), os parâmetros do servidor
+# aplicados em cada conexão (ex: synchronous_commit, statement_timeout, lock_timeout,
+# deadlock_timeout) e os parâmetros do cliente libpq (ex: keepalives, connect_timeout).
+# Os perfis são lidos de ARQUIVO_PERFIS; cada perfil sobrescreve os campos de PERFIL_PADRAO.
+# Variáveis de ambiente sobrescrevem o perfil escolhido:
+#   OFICINA4_PERFIL (nome do perfil), OFICINA4_PERFIS_ARQUIVO (caminho do arquivo),
+#   OFICINA4_DB_HOST, OFICINA4_DB_PORT, OFICINA4_DB_USER, OFICINA4_DB_PASSWORD, OFICINA4_DB_NAME,
+#   OFICINA4_PG_<PARAMETRO> (parâmetro do servidor, ex: OFICINA4_PG_SYNCHRONOUS_COMMIT=off).
+ARQUIVO_PERFIS = os.environ.get('OFICINA4_PERFIS_ARQUIVO', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfis.json'))
+
+PERFIL_PADRAO = {
     'host': 'localhost',
     'port': '5432',
-    'dbname': 'postgres',
     'user': 'postgres',
     'password': '1234',
-    'options': '-c client_encoding=UTF8'
+    'dbname': 'oficina4',
+    'dbname_admin': 'postgres',
+    # Réplicas: lista de campos que diferem do primário (ex: [{'port': '5433'}])
+    'replicas': [],
+    'servidor': {'client_encoding': 'UTF8'},
+    'cliente': {}
 }
 
-DB_CONFIG_OFICINA4 = {
-    'host': 'localhost',
-    'port': '5432',
-    'dbname': 'oficina4',
-    'user': 'postgres',
-    'password': '1234',
-    'options': '-c client_encoding=UTF8'
+VARIAVEIS_AMBIENTE_PERFIL = {
+    'OFICINA4_DB_HOST': 'host',
+    'OFICINA4_DB_PORT': 'port',
+    'OFICINA4_DB_USER': 'user',
+    'OFICINA4_DB_PASSWORD': 'password',
+    'OFICINA4_DB_NAME': 'dbname'
+}
+
+def carregar_perfil(nome=None, arquivo=None):
+    """
+    Monta o perfil de implantação 'nome' a partir do arquivo de perfis e das variáveis de ambiente.
+    Sem nome, usa OFICINA4_PERFIL ou 'padrao'. Se o arquivo não existir, apenas o perfil
+    'padrao' (PERFIL_PADRAO) está disponível.
+    Retorna um dicionário com os campos de PERFIL_PADRAO mais 'nome', 'rotulo' (o nome, com
+    '+env' se alguma variável de ambiente sobrescreveu o perfil) e 'assinatura' (hash curto
+    da configuração efetiva), que identificam o perfil nos resultados.
+    """
+    nome = nome or os.environ.get('OFICINA4_PERFIL', 'padrao')
+    arquivo = arquivo or ARQUIVO_PERFIS
+    perfis = {}
+    if os.path.exists(arquivo):
+        with open(arquivo, encoding='utf-8') as f:
+            perfis = json.load(f)
+    if nome not in perfis and nome != 'padrao':
+        raise ValueError(f"Perfil '{nome}' não encontrado em '{arquivo}'.")
+
+    perfil = {**PERFIL_PADRAO, 'nome': nome}
+    for chave, valor in perfis.get(nome, {}).items():
+        if chave not in PERFIL_PADRAO:
+            raise ValueError(f"Campo '{chave}' do perfil '{nome}' não é suportado.")
+        if chave in ('servidor', 'cliente'):
+            # Os parâmetros são combinados com os do padrão, não substituídos
+            valor = {**PERFIL_PADRAO[chave], **valor}
+        perfil[chave] = valor
+
+    perfil['servidor'] = dict(perfil['servidor'])
+    sobrescrito = False
+    for variavel, valor in os.environ.items():
+        if variavel in VARIAVEIS_AMBIENTE_PERFIL:
+            perfil[VARIAVEIS_AMBIENTE_PERFIL[variavel]] = valor
+            sobrescrito = True
+        elif variavel.startswith('OFICINA4_PG_'):
+            perfil['servidor'][variavel[len('OFICINA4_PG_'):].lower()] = valor
+            sobrescrito = True
+    perfil['rotulo'] = f"{nome}+env" if sobrescrito else nome
+    configuracao = json.dumps(configuracao_efetiva(perfil), sort_keys=True, default=str)
+    perfil['assinatura'] = hashlib.sha1(configuracao.encode('utf-8')).hexdigest()[:8]
+    return perfil
+
+def configuracao_efetiva(perfil):
+    """
+    Retorna a parte do perfil que afeta os resultados (sem a senha), usada para gravar
+    e comparar a configuração de cada experimento.
+    """
+    return {
+        'host': perfil['host'],
+        'port': str(perfil['port']),
+        'dbname': perfil['dbname'],
+        'replicas': perfil['replicas'],
+        'servidor': perfil['servidor'],
+        'cliente': perfil['cliente']
+    }
+
+def montar_db_config(perfil, dbname, **sobrescritas):
+    """
+    Converte um perfil nos parâmetros de psycopg2.connect para o banco 'dbname'.
+    Os parâmetros do servidor vão em 'options' (-c nome=valor) e valem para toda a conexão.
+    """
+    opcoes = []
+    for parametro, valor in perfil['servidor'].items():
+        # Espaços no valor precisam ser escapados dentro de 'options'
+        valor = str(valor).replace('\\', '\\\\').replace(' ', '\\ ')
+        opcoes.append(f"-c {parametro}={valor}")
+    db_config = {
+        'host': perfil['host'],
+        'port': str(perfil['port']),
+        'dbname': dbname,
+        'user': perfil['user'],
+        'password': perfil['password'],
+        'options': ' '.join(opcoes),
+        **perfil['cliente']
+    }
+    db_config.update(sobrescritas)
+    return db_config
+
+def aplicar_perfil(nome=None):
+    """
+    Ativa o perfil 'nome', reconstruindo DB_CONFIG_ADMIN, DB_CONFIG_OFICINA4 e DB_CONFIG_REPLICAS.
+    As conexões abertas depois da chamada (inclusive dos agentes) passam a usar o novo perfil,
+    o que permite trocar de perfil entre as células de um experimento.
+    Retorna o perfil ativado.
+    """
+    global PERFIL_ATIVO, DB_CONFIG_ADMIN, DB_CONFIG_OFICINA4, DB_CONFIG_REPLICAS
+    perfil = carregar_perfil(nome)
+    PERFIL_ATIVO = perfil
+    DB_CONFIG_ADMIN = montar_db_config(perfil, perfil['dbname_admin'])
+    DB_CONFIG_OFICINA4 = montar_db_config(perfil, perfil['dbname'])
+    # Réplicas (standbys em streaming replication) usadas para as consultas de disponibilidade.
+    # Com a lista vazia todas as consultas vão para o primário.
+    DB_CONFIG_REPLICAS = [montar_db_config(perfil, perfil['dbname'], **replica) for replica in perfil['replicas']]
+    return perfil
+
+# --- Configurações do Banco de Dados ---
+# Definidas pelo perfil ativo; use aplicar_perfil() para trocar de perfil
+PERFIL_ATIVO = None
+DB_CONFIG_ADMIN = None
+DB_CONFIG_OFICINA4 = None
+DB_CONFIG_REPLICAS = []
+aplicar_perfil()
+
+# --- Tempos Simulados dos Agentes ---
+# Tempo (em segundos) que o cliente leva para escolher o assento e pausa entre tentativas.
+# O benchmark (benchmark.py) reduz esses valores para que a matriz termine em minutos.
+TEMPO_RESERVA = 1
+PAUSA_RETENTATIVA = 0.01
+
+# --- Configuração de Armazenamento da Tabela 'Assentos' ---
+# Repassada para criar_tabela_assentos(). Os valores padrão mantêm a tabela simples original;
+# exemplo de modo de ajuste: {'particionamento': 'hash', 'num_particoes': 4, 'fillfactor': 70,
+# 'autovacuum': {'autovacuum_vacuum_scale_factor': 0.0, 'autovacuum_vacuum_threshold': 50}, 'recriar': True}
+CONFIG_TABELA_ASSENTOS = {
+    'particionamento': None,
+    'num_particoes': 4,
+    'fillfactor': None,
+    'autovacuum': None,
+    'recriar': False
 }
 
+# --- Configuração do Alocador de Assentos (Versão C) ---
+# Quantidade de assentos pré-buscados por consulta e de reservas persistidas por commit
+TAMANHO_LOTE_ALOCADOR = 20
+# Tempo máximo (em segundos) que uma reserva confirmada espera na fila antes de ser persistida
+INTERVALO_PERSISTENCIA = 0.5
+# Falhas consecutivas no banco (persistência ou reabastecimento) antes de o alocador desistir
+MAX_FALHAS_ALOCADOR = 5
+
+# Falhas consecutivas ao ler das réplicas (somando todos os agentes) antes de encerrar a célula
+MAX_FALHAS_REPLICA = 10
+
 # --- Variáveis Globais para Coleta de Métricas ---
 # Usamos Locks para proteger o acesso a essas variáveis compartilhadas entre threads
 metrics_lock = threading.Lock()
@@ -32,6 +181,26 @@ total_deadlocks = 0
 total_rollbacks = 0
 # Lista para armazenar o número de tentativas por reserva bem-sucedida
 all_attempts_per_reservation = [] 
+# Lista com o tempo (em segundos) desde a primeira tentativa até a confirmação de cada reserva
+all_latencies_per_reservation = []
+# Reservas que falharam porque o assento lido como disponível já estava ocupado no primário
+total_conflitos_leitura = 0
+# Falhas consecutivas de leitura nas réplicas; ao atingir MAX_FALHAS_REPLICA a célula é encerrada
+falhas_replica_consecutivas = 0
+replica_indisponivel = False
+# Atraso de replicação observado em cada leitura na réplica: em segundos e em bytes de WAL
+# ainda não aplicados (distância entre o LSN do primário e o LSN aplicado pela réplica)
+all_replication_lags = []
+all_replication_lag_bytes = []
+# Métricas do alocador (versão C): commits em lote, maior número de reservas confirmadas
+# aos agentes e ainda não persistidas, reservas não persistidas e latência até o commit
+total_lotes_persistidos = 0
+max_reservas_pendentes = 0
+total_reservas_perdidas = 0
+all_persist_latencies = []
+# Contador para distribuir as leituras entre as réplicas (round-robin)
+replica_lock = threading.Lock()
+proxima_replica = 0
 
 # --- Funções de Conexão e Configuração do Banco ---
 def get_conexao_db(db_config, isolation_level=None):
@@ -52,9 +221,111 @@ def get_conexao_db(db_config, isolation_level=None):
             raise ValueError(f"Nível de isolamento '{isolation_level}' não suportado. Use 'read committed' ou 'serializable'.")
     return conn
 
+def get_conexao_leitura():
+    """
+    Camada de roteamento sobre get_conexao_db: abre uma conexão somente leitura com uma das
+    réplicas de DB_CONFIG_REPLICAS, escolhida em round-robin.
+    A conexão usa o isolamento padrão (read committed), pois um standby não aceita SERIALIZABLE.
+    """
+    global proxima_replica
+    if not DB_CONFIG_REPLICAS:
+        raise ValueError("Nenhuma réplica configurada no perfil ativo (campo 'replicas').")
+    with replica_lock:
+        replica_config = DB_CONFIG_REPLICAS[proxima_replica % len(DB_CONFIG_REPLICAS)]
+        proxima_replica += 1
+    conn = get_conexao_db(replica_config)
+    conn.readonly = True
+    return conn
+
+def ler_assentos_disponiveis_replica(conn_primario):
+    """
+    Executa a consulta de disponibilidade (sem bloqueio) em uma réplica e registra o atraso
+    de replicação observado no momento da leitura.
+    O atraso é medido contra o LSN atual do primário (lido pela conexão conn_primario do agente):
+    uma réplica que já aplicou esse LSN tem atraso zero, mesmo com o primário ocioso.
+    Retorna a lista de tuplas (num_voo,) dos assentos disponíveis segundo a réplica.
+    Após MAX_FALHAS_REPLICA falhas consecutivas nas réplicas, lança RuntimeError, que faz o
+    agente sinalizar parada em vez de retentar indefinidamente.
+    """
+    global falhas_replica_consecutivas, replica_indisponivel
+    cur_primario = conn_primario.cursor()
+    cur_primario.execute("SELECT pg_current_wal_lsn();")
+    lsn_primario = cur_primario.fetchone()[0]
+    cur_primario.close()
+
+    conn = None
+    try:
+        conn = get_conexao_leitura()
+        cur = conn.cursor()
+        # Em segundos, estima pelo horário do último commit aplicado só quando a réplica está atrasada
+        cur.execute("""
+            SELECT GREATEST(pg_wal_lsn_diff(%s::pg_lsn, pg_last_wal_replay_lsn()), 0),
+                   CASE WHEN pg_last_wal_replay_lsn() >= %s::pg_lsn THEN 0
+                        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END;
+        """, (lsn_primario, lsn_primario))
+        lag_bytes, lag = cur.fetchone()
+        cur.execute("SELECT num_voo FROM Assentos WHERE disp = TRUE ORDER BY num_voo ASC;")
+        disponiveis = cur.fetchall()
+        conn.commit()
+        cur.close()
+    except psycopg2.Error as e:
+        with metrics_lock:
+            falhas_replica_consecutivas += 1
+            if falhas_replica_consecutivas >= MAX_FALHAS_REPLICA:
+                replica_indisponivel = True
+        if replica_indisponivel:
+            raise RuntimeError(f"Réplica indisponível após {MAX_FALHAS_REPLICA} falhas consecutivas: {e}") from e
+        raise
+    finally:
+        if conn: conn.close()
+    with metrics_lock:
+        falhas_replica_consecutivas = 0
+        all_replication_lags.append(float(lag))
+        all_replication_lag_bytes.append(int(lag_bytes))
+    return disponiveis
+
+def aguardar_sincronizacao_replicas(timeout=30):
+    """
+    Espera até que todas as réplicas tenham aplicado o WAL gerado até agora pelo primário,
+    para que uma célula do experimento não comece lendo o estado da célula anterior.
+    Retorna a lista das réplicas ('host:porta') que não sincronizaram dentro do tempo limite
+    (vazia se todas sincronizaram).
+    """
+    conn = None
+    try:
+        conn = get_conexao_db(DB_CONFIG_OFICINA4)
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute("SELECT pg_current_wal_lsn();")
+        lsn_primario = cur.fetchone()[0]
+        cur.close()
+    finally:
+        if conn: conn.close()
+
+    limite = time.time() + timeout
+    atrasadas = []
+    for replica_config in DB_CONFIG_REPLICAS:
+        conn_replica = get_conexao_db(replica_config)
+        conn_replica.autocommit = True
+        cur_replica = conn_replica.cursor()
+        try:
+            while True:
+                cur_replica.execute("SELECT pg_last_wal_replay_lsn() >= %s::pg_lsn;", (lsn_primario,))
+                if cur_replica.fetchone()[0]:
+                    break
+                if time.time() > limite:
+                    print(f"AVISO: réplica {replica_config['host']}:{replica_config['port']} não sincronizou em {timeout}s.")
+                    atrasadas.append(f"{replica_config['host']}:{replica_config['port']}")
+                    break
+                time.sleep(0.1)
+        finally:
+            cur_replica.close()
+            conn_replica.close()
+    return atrasadas
+
 def criar_banco_oficina4():
     """
-    Cria o banco de dados 'oficina4' se ele ainda não existir.
+    Cria o banco de dados 'oficina4' (ou o definido pelo perfil ativo) se ele ainda não existir.
     Conecta-se ao banco de dados administrativo ('postgres') para realizar esta operação.
     """
     conn_admin = None
@@ -64,13 +335,15 @@ def criar_banco_oficina4():
         conn_admin.autocommit = True 
         cur_admin = conn_admin.cursor()
 
-        cur_admin.execute("SELECT 1 FROM pg_database WHERE datname = 'oficina4'")
+        # O nome do banco vem do perfil ativo ('oficina4' no perfil padrão)
+        nome_banco = DB_CONFIG_OFICINA4['dbname']
+        cur_admin.execute("SELECT 1 FROM pg_database WHERE datname = %s", (nome_banco,))
         existe = cur_admin.fetchone()
         if not existe:
-            cur_admin.execute("CREATE DATABASE oficina4 WITH ENCODING 'UTF8' LC_COLLATE 'C' LC_CTYPE 'C' TEMPLATE template0;")
-            print("Banco de dados 'oficina4' criado com sucesso.")
+            cur_admin.execute(sql.SQL("CREATE DATABASE {} WITH ENCODING 'UTF8' LC_COLLATE 'C' LC_CTYPE 'C' TEMPLATE template0;").format(sql.Identifier(nome_banco)))
+            print(f"Banco de dados '{nome_banco}' criado com sucesso.")
         else:
-            print("Banco de dados 'oficina4' já existe.")
+            print(f"Banco de dados '{nome_banco}' já existe.")
         cur_admin.close()
     except psycopg2.Error as e:
         print(f"Erro ao criar o banco de dados 'oficina4': {e}")
@@ -83,11 +356,70 @@ def criar_banco_oficina4():
             conn_admin.close()
     return True
 
-def criar_tabela_assentos():
+def _parametros_storage(fillfactor=None, autovacuum=None):
+    """
+    Monta a lista de parâmetros de armazenamento de uma tabela ('nome = valor'),
+    combinando o fillfactor e as configurações de autovacuum por tabela.
+    """
+    parametros = []
+    if fillfactor is not None:
+        if not 10 <= int(fillfactor) <= 100:
+            raise ValueError(f"Fillfactor '{fillfactor}' inválido. Use um valor entre 10 e 100.")
+        parametros.append(f"fillfactor = {int(fillfactor)}")
+    for chave, valor in (autovacuum or {}).items():
+        if not chave.startswith(('autovacuum_', 'toast.autovacuum_')):
+            raise ValueError(f"Parâmetro '{chave}' não é uma configuração de autovacuum.")
+        parametros.append(f"{chave} = {valor}")
+    return parametros
+
+def _layout_assentos(cur):
+    """
+    Retorna o layout atual da tabela 'Assentos': None se ela não existir, ou uma tupla
+    (particionamento, num_particoes, partições) com particionamento None, 'hash' ou 'range'.
+    """
+    cur.execute("""
+        SELECT c.relkind, pt.partstrat
+        FROM pg_class c LEFT JOIN pg_partitioned_table pt ON pt.partrelid = c.oid
+        WHERE c.oid = to_regclass('assentos');
+    """)
+    linha = cur.fetchone()
+    if linha is None:
+        return None
+    relkind, partstrat = linha
+    if relkind != 'p':
+        return (None, 0, [])
+    cur.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'assentos'::regclass ORDER BY c.relname;
+    """)
+    particoes = [row[0] for row in cur.fetchall()]
+    return ({'h': 'hash', 'r': 'range'}.get(partstrat, partstrat), len(particoes), particoes)
+
+def criar_tabela_assentos(particionamento=None, num_particoes=4, fillfactor=None, autovacuum=None, recriar=False):
     """
     Cria a tabela 'Assentos' no banco de dados 'oficina4' se ela ainda não existir.
     Conecta-se diretamente ao banco de dados 'oficina4' para realizar esta operação.
+
+    Opções de armazenamento (todas opcionais, o padrão mantém a tabela simples original):
+    - particionamento: None, 'hash' ou 'range' (particiona a tabela por num_voo);
+    - num_particoes: quantidade de partições criadas quando há particionamento;
+    - fillfactor: percentual de preenchimento das páginas (ex: 70), deixando espaço
+      livre para que o UPDATE de 'disp' seja feito como HOT update;
+    - autovacuum: dicionário com parâmetros de autovacuum por tabela
+      (ex: {'autovacuum_vacuum_scale_factor': 0.0, 'autovacuum_vacuum_threshold': 50});
+    - recriar: remove a tabela existente antes de criá-la.
+
+    Se a tabela já existir (sem recriar), o particionamento dela precisa ser o pedido, senão a
+    função falha e exige recriar=True; fillfactor e autovacuum são aplicados com ALTER TABLE
+    ... SET (o novo fillfactor só vale para páginas escritas a partir daí).
     """
+    if particionamento is not None and particionamento.lower() not in ("hash", "range"):
+        raise ValueError(f"Particionamento '{particionamento}' não suportado. Use 'hash' ou 'range'.")
+    if particionamento is not None and not 1 <= num_particoes <= 200:
+        raise ValueError(f"Número de partições '{num_particoes}' inválido. Use um valor entre 1 e 200.")
+    parametros_storage = _parametros_storage(fillfactor, autovacuum)
+    storage = " WITH (" + ", ".join(parametros_storage) + ")" if parametros_storage else ""
+
     conn_oficina4 = None
     try:
         print("Tentando conectar ao banco de dados 'oficina4' para criar a tabela...")
@@ -96,12 +428,59 @@ def criar_tabela_assentos():
         conn_oficina4.autocommit = True
         cur_oficina4 = conn_oficina4.cursor()
 
-        cur_oficina4.execute("""
-            CREATE TABLE IF NOT EXISTS Assentos (
-                num_voo INTEGER PRIMARY KEY CHECK (num_voo BETWEEN 1 AND 200),
-                disp BOOLEAN DEFAULT TRUE
-            );
-        """)
+        if recriar:
+            cur_oficina4.execute("DROP TABLE IF EXISTS Assentos CASCADE;")
+
+        layout = _layout_assentos(cur_oficina4)
+        if layout is not None:
+            # Tabela já existe: CREATE TABLE IF NOT EXISTS não mudaria nada, então confere
+            # o layout e aplica os parâmetros de armazenamento explicitamente
+            particionamento_atual, particoes_atuais, particoes = layout
+            pedido = particionamento.lower() if particionamento else None
+            if particionamento_atual != pedido or (pedido and particoes_atuais != num_particoes):
+                print(f"Erro: a tabela 'Assentos' já existe com particionamento={particionamento_atual} "
+                      f"({particoes_atuais} partições), diferente do pedido ({pedido}, {num_particoes if pedido else 0} partições). "
+                      "Use recriar=True para aplicar o novo layout.")
+                cur_oficina4.close()
+                return False
+            if parametros_storage:
+                for tabela in (particoes if pedido else ['assentos']):
+                    cur_oficina4.execute(f"ALTER TABLE {tabela} SET ({', '.join(parametros_storage)});")
+                if fillfactor is not None:
+                    print("AVISO: o fillfactor foi alterado em uma tabela existente e só vale para páginas novas; "
+                          "use recriar=True para reescrever a tabela com ele.")
+            print("Tabela 'Assentos' já existe; parâmetros de armazenamento aplicados.")
+            cur_oficina4.close()
+            return True
+
+        if particionamento is None:
+            cur_oficina4.execute(f"""
+                CREATE TABLE Assentos (
+                    num_voo INTEGER PRIMARY KEY CHECK (num_voo BETWEEN 1 AND 200),
+                    disp BOOLEAN DEFAULT TRUE
+                ){storage};
+            """)
+        else:
+            # Tabelas particionadas não aceitam parâmetros de armazenamento próprios:
+            # fillfactor e autovacuum são aplicados em cada partição.
+            metodo = particionamento.upper()
+            cur_oficina4.execute(f"""
+                CREATE TABLE Assentos (
+                    num_voo INTEGER PRIMARY KEY CHECK (num_voo BETWEEN 1 AND 200),
+                    disp BOOLEAN DEFAULT TRUE
+                ) PARTITION BY {metodo} (num_voo);
+            """)
+            for i in range(num_particoes):
+                if metodo == "HASH":
+                    limites = f"FOR VALUES WITH (MODULUS {num_particoes}, REMAINDER {i})"
+                else:
+                    # Divide a faixa 1..200 em intervalos contíguos (limite superior exclusivo)
+                    inicio = 1 + (200 * i) // num_particoes
+                    fim = 1 + (200 * (i + 1)) // num_particoes
+                    limites = f"FOR VALUES FROM ({inicio}) TO ({fim})"
+                cur_oficina4.execute(
+                    f"CREATE TABLE Assentos_p{i} PARTITION OF Assentos {limites}{storage};"
+                )
         print("Tabela 'Assentos' criada com sucesso.")
         cur_oficina4.close()
     except psycopg2.Error as e:
@@ -115,6 +494,38 @@ def criar_tabela_assentos():
             conn_oficina4.close()
     return True
 
+def coletar_estatisticas_assentos():
+    """
+    Lê de 'pg_stat_user_tables' as estatísticas de armazenamento da tabela 'Assentos'
+    (somando todas as partições, se houver): tuplas mortas, updates e HOT updates.
+    Retorna um dicionário com os contadores, ou None se a consulta falhar.
+    """
+    conn = None
+    try:
+        conn = get_conexao_db(DB_CONFIG_OFICINA4)
+        conn.autocommit = True
+        cur = conn.cursor()
+        # Os nomes sem aspas são guardados em minúsculas no catálogo
+        cur.execute("""
+            SELECT COALESCE(SUM(n_dead_tup), 0), COALESCE(SUM(n_live_tup), 0),
+                   COALESCE(SUM(n_tup_upd), 0), COALESCE(SUM(n_tup_hot_upd), 0)
+            FROM pg_stat_user_tables
+            WHERE relname = 'assentos' OR relname LIKE 'assentos\\_p%';
+        """)
+        n_dead_tup, n_live_tup, n_tup_upd, n_tup_hot_upd = cur.fetchone()
+        cur.close()
+        return {
+            'n_dead_tup': int(n_dead_tup),
+            'n_live_tup': int(n_live_tup),
+            'n_tup_upd': int(n_tup_upd),
+            'n_tup_hot_upd': int(n_tup_hot_upd)
+        }
+    except psycopg2.Error as e:
+        print(f"Erro ao coletar estatísticas da tabela 'Assentos': {e}")
+        return None
+    finally:
+        if conn: conn.close()
+
 def inicializar_assentos():
     """
     Inicializa a tabela 'Assentos', limpando todos os dados existentes
@@ -177,25 +588,35 @@ def limpar_assentos():
         if conn: conn.close()
 
 # --- Funções de Reserva de Assentos ---
-def reservar_assento_versao_a(id_agente, stop_event, isolation_level):
+def reservar_assento_versao_a(id_agente, stop_event, isolation_level, usar_replica=False):
     """
     Tenta reservar um assento em uma única transação, usando FOR UPDATE para bloqueio.
     Continua tentando até que o evento de parada seja sinalizado.
     Recebe o nível de isolamento para a transação.
+    Com usar_replica=True, a consulta de disponibilidade é feita em uma réplica e apenas o
+    assento escolhido é bloqueado e atualizado no primário, por um UPDATE condicional.
     """
-    global total_deadlocks, total_rollbacks, all_attempts_per_reservation
+    global total_deadlocks, total_rollbacks, total_conflitos_leitura, all_attempts_per_reservation, all_latencies_per_reservation
     attempts = 0
     while not stop_event.is_set():
         conn = None
         cur = None
         attempts += 1 # Conta cada tentativa de reserva
+        if attempts == 1:
+            inicio_reserva = time.time() # Início da primeira tentativa desta reserva
         try:
             conn = get_conexao_db(DB_CONFIG_OFICINA4, isolation_level=isolation_level)
             cur = conn.cursor()
             # conn.autocommit = False já é o padrão em get_conexao_db
 
-            cur.execute("SELECT num_voo FROM Assentos WHERE disp = TRUE ORDER BY num_voo ASC FOR UPDATE;")
-            disponiveis = cur.fetchall()
+            if usar_replica:
+                disponiveis = ler_assentos_disponiveis_replica(conn)
+                # Encerra a transação aberta pela leitura do LSN no primário: o UPDATE condicional
+                # deve começar uma transação nova (com snapshot novo, em SERIALIZABLE) após a escolha
+                conn.commit()
+            else:
+                cur.execute("SELECT num_voo FROM Assentos WHERE disp = TRUE ORDER BY num_voo ASC FOR UPDATE;")
+                disponiveis = cur.fetchall()
 
             if not disponiveis:
                 print(f"[Agente-{id_agente}]: Nenhum assento disponível. Sinalizando parada.")
@@ -203,21 +624,28 @@ def reservar_assento_versao_a(id_agente, stop_event, isolation_level):
                 stop_event.set()
                 break
 
-            time.sleep(1) # Simula o tempo de duração da reserva
+            time.sleep(TEMPO_RESERVA) # Simula o tempo de duração da reserva
             escolhido = random.choice(disponiveis)[0]
 
-            cur.execute("UPDATE Assentos SET disp = FALSE WHERE num_voo = %s;", (escolhido,))
+            if usar_replica:
+                # A leitura na réplica não bloqueou nada: o UPDATE condicional bloqueia no primário
+                # apenas o assento escolhido e falha se ele já foi reservado
+                cur.execute("UPDATE Assentos SET disp = FALSE WHERE num_voo = %s AND disp = TRUE;", (escolhido,))
+            else:
+                cur.execute("UPDATE Assentos SET disp = FALSE WHERE num_voo = %s;", (escolhido,))
             
             if cur.rowcount == 0:
                 print(f"[Agente-{id_agente}]: Assento {escolhido} não foi atualizado (já reservado por outro?). Retentando...")
                 conn.rollback()
                 with metrics_lock:
+                    total_conflitos_leitura += 1
                     total_rollbacks += 1 # Conta rollback por falha na atualização
             else:
                 conn.commit()
                 print(f"[Agente-{id_agente}]: Reservado assento {escolhido} (Tentativas: {attempts})")
                 with metrics_lock:
                     all_attempts_per_reservation.append(attempts) # Registra tentativas
+                    all_latencies_per_reservation.append(time.time() - inicio_reserva)
                 attempts = 0 # Reseta tentativas para a próxima reserva
                 # Não quebra o loop, o agente continua tentando reservar outro assento
                 # até que stop_event seja setado por falta de assentos.
@@ -241,30 +669,36 @@ def reservar_assento_versao_a(id_agente, stop_event, isolation_level):
         finally:
             if cur: cur.close()
             if conn: conn.close()
-        time.sleep(0.01) # Pequeno delay para evitar busy-waiting
+        time.sleep(PAUSA_RETENTATIVA) # Pequeno delay para evitar busy-waiting
 
-def reservar_assento_versao_b(id_agente, stop_event, isolation_level):
+def reservar_assento_versao_b(id_agente, stop_event, isolation_level, usar_replica=False):
     """
     Tenta reservar um assento em duas transações separadas (seleção e atualização).
     Usa um UPDATE condicional para garantir atomicidade na reserva.
     Continua tentando até que o evento de parada seja sinalizado.
     Recebe o nível de isolamento para a transação.
+    Com usar_replica=True, a transação de seleção é feita em uma réplica.
     """
-    global total_deadlocks, total_rollbacks, all_attempts_per_reservation
+    global total_deadlocks, total_rollbacks, total_conflitos_leitura, all_attempts_per_reservation, all_latencies_per_reservation
     attempts = 0
     while not stop_event.is_set():
         conn = None
         cur1 = None
         cur2 = None
         attempts += 1 # Conta cada tentativa de reserva
+        if attempts == 1:
+            inicio_reserva = time.time() # Início da primeira tentativa desta reserva
         try:
             conn = get_conexao_db(DB_CONFIG_OFICINA4, isolation_level=isolation_level)
             # conn.autocommit = False já é o padrão em get_conexao_db
 
             # Transação 1: buscar assentos disponíveis (sem bloqueio)
-            cur1 = conn.cursor()
-            cur1.execute("SELECT num_voo FROM Assentos WHERE disp = TRUE ORDER BY num_voo ASC;")
-            disponiveis = cur1.fetchall()
+            if usar_replica:
+                disponiveis = ler_assentos_disponiveis_replica(conn)
+            else:
+                cur1 = conn.cursor()
+                cur1.execute("SELECT num_voo FROM Assentos WHERE disp = TRUE ORDER BY num_voo ASC;")
+                disponiveis = cur1.fetchall()
 
             if not disponiveis:
                 print(f"[Agente-{id_agente}]: Nenhum assento disponível. Sinalizando parada.")
@@ -273,9 +707,9 @@ def reservar_assento_versao_b(id_agente, stop_event, isolation_level):
                 break
 
             conn.commit() # Fecha a transação 1, liberando o cursor1
-            cur1.close()
+            if cur1: cur1.close()
             
-            time.sleep(1) # Simula o tempo de duração da reserva
+            time.sleep(TEMPO_RESERVA) # Simula o tempo de duração da reserva
             escolhido = random.choice(disponiveis)[0]
 
             # Transação 2: Tentativa de reserva (usa o estado atual do DB)
@@ -286,12 +720,14 @@ def reservar_assento_versao_b(id_agente, stop_event, isolation_level):
                 print(f"[Agente-{id_agente}]: Assento {escolhido} já foi reservado por outro agente ou não existe mais. Retentando...")
                 conn.rollback() # Não conseguiu reservar, faz rollback da transação 2
                 with metrics_lock:
+                    total_conflitos_leitura += 1
                     total_rollbacks += 1 # Conta rollback por falha na atualização
             else:
                 conn.commit()
                 print(f"[Agente-{id_agente}]: Reservado assento {escolhido} (Tentativas: {attempts})")
                 with metrics_lock:
                     all_attempts_per_reservation.append(attempts) # Registra tentativas
+                    all_latencies_per_reservation.append(time.time() - inicio_reserva)
                 attempts = 0 # Reseta tentativas para a próxima reserva
                 # Não quebra o loop, o agente continua tentando reservar outro assento
 
@@ -315,52 +751,291 @@ def reservar_assento_versao_b(id_agente, stop_event, isolation_level):
             if 'cur1' in locals() and cur1 and not cur1.closed: cur1.close()
             if 'cur2' in locals() and cur2 and not cur2.closed: cur2.close()
             if conn: conn.close()
-        time.sleep(0.01)
+        time.sleep(PAUSA_RETENTATIVA)
+
+# --- Alocador de Assentos (Versão C) ---
+def persistir_lote(conn, pendentes):
+    """
+    Persiste em um único commit as reservas confirmadas aos agentes.
+    Recebe a lista de tuplas (num_voo, instante da confirmação) e retorna o número de
+    assentos que não puderam ser marcados (já estavam ocupados no banco).
+    """
+    global total_lotes_persistidos, all_persist_latencies
+    assentos = [num_voo for num_voo, _ in pendentes]
+    cur = conn.cursor()
+    try:
+        cur.execute("UPDATE Assentos SET disp = FALSE WHERE num_voo = ANY(%s::int[]) AND disp = TRUE;", (assentos,))
+        nao_persistidos = len(assentos) - cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+    agora = time.time()
+    with metrics_lock:
+        total_lotes_persistidos += 1
+        all_persist_latencies.extend(agora - instante for _, instante in pendentes)
+    return nao_persistidos
+
+def alocador_assentos(stop_event, fim_agentes_event, fila_assentos, fila_confirmacoes, isolation_level):
+    """
+    Thread única que é dona dos assentos livres: pré-busca lotes de assentos disponíveis,
+    entrega-os aos agentes pela fila_assentos e persiste as reservas recebidas pela
+    fila_confirmacoes em commits em lote (TAMANHO_LOTE_ALOCADOR ou INTERVALO_PERSISTENCIA).
+    Sinaliza parada quando não há mais assentos e termina após fim_agentes_event,
+    depois de persistir as reservas restantes.
+    Após MAX_FALHAS_ALOCADOR erros consecutivos no banco, desiste: conta as reservas pendentes
+    como perdidas e sinaliza parada (as confirmações que ainda chegarem são contadas por
+    executar_reservas).
+    """
+    global total_rollbacks, total_deadlocks, max_reservas_pendentes, total_reservas_perdidas
+    conn = None
+    entregues = set() # Assentos entregues aos agentes e ainda não persistidos
+    pendentes = [] # Reservas confirmadas aos agentes aguardando o commit em lote
+    falhas_consecutivas = 0
+    try:
+        conn = get_conexao_db(DB_CONFIG_OFICINA4, isolation_level=isolation_level)
+        while True:
+            # Verificado antes de esvaziar a fila: depois do join dos agentes não chegam novas confirmações
+            encerrar = fim_agentes_event.is_set()
+            try:
+                while True:
+                    pendentes.append(fila_confirmacoes.get_nowait())
+            except queue.Empty:
+                pass
+            with metrics_lock:
+                max_reservas_pendentes = max(max_reservas_pendentes, len(pendentes))
+
+            lote_cheio = len(pendentes) >= TAMANHO_LOTE_ALOCADOR
+            lote_expirado = pendentes and time.time() - pendentes[0][1] >= INTERVALO_PERSISTENCIA
+            if pendentes and (lote_cheio or lote_expirado or encerrar):
+                try:
+                    nao_persistidos = persistir_lote(conn, pendentes)
+                    if nao_persistidos:
+                        print(f"[Alocador]: {nao_persistidos} reserva(s) do lote já estavam ocupadas no banco.")
+                        with metrics_lock:
+                            total_reservas_perdidas += nao_persistidos
+                    for num_voo, _ in pendentes:
+                        entregues.discard(num_voo)
+                    pendentes = []
+                    falhas_consecutivas = 0
+                except errors.DeadlockDetected as e:
+                    print(f"[Alocador]: Deadlock detectado ao persistir lote! Rollback e retentando. Erro: {e}")
+                    conn.rollback()
+                    falhas_consecutivas += 1
+                    with metrics_lock:
+                        total_deadlocks += 1
+                        total_rollbacks += 1
+                except psycopg2.Error as e:
+                    print(f"[Alocador]: Erro no DB ao persistir lote: {e}. Rollback e retentando...")
+                    conn.rollback()
+                    falhas_consecutivas += 1
+                    with metrics_lock:
+                        total_rollbacks += 1
+
+            if encerrar and not pendentes:
+                break
+
+            # Reabastece a fila com assentos livres que ainda não foram entregues
+            if not stop_event.is_set() and fila_assentos.qsize() < TAMANHO_LOTE_ALOCADOR:
+                try:
+                    cur = conn.cursor()
+                    cur.execute(
+                        "SELECT num_voo FROM Assentos WHERE disp = TRUE AND NOT (num_voo = ANY(%s::int[])) ORDER BY num_voo ASC LIMIT %s;",
+                        (list(entregues), TAMANHO_LOTE_ALOCADOR)
+                    )
+                    novos = cur.fetchall()
+                    cur.close()
+                    conn.commit()
+                    if not novos and fila_assentos.empty():
+                        print("[Alocador]: Nenhum assento disponível. Sinalizando parada.")
+                        stop_event.set()
+                    for (num_voo,) in novos:
+                        entregues.add(num_voo)
+                        fila_assentos.put(num_voo)
+                except psycopg2.Error as e:
+                    print(f"[Alocador]: Erro no DB ao buscar assentos livres: {e}. Rollback e retentando...")
+                    conn.rollback()
+                    falhas_consecutivas += 1
+                    with metrics_lock:
+                        total_rollbacks += 1
+
+            if falhas_consecutivas >= MAX_FALHAS_ALOCADOR:
+                raise RuntimeError(f"{falhas_consecutivas} falhas consecutivas no banco")
+
+            time.sleep(0.01) # Pequeno delay para evitar busy-waiting
+    except Exception as e:
+        print(f"[Alocador]: Erro inesperado: {e}. {len(pendentes)} reserva(s) não persistida(s). Sinalizando parada.")
+        with metrics_lock:
+            total_reservas_perdidas += len(pendentes)
+        stop_event.set()
+        if conn:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass # A conexão pode já ter sido perdida
+    finally:
+        if conn: conn.close()
+
+def reservar_assento_versao_c(id_agente, stop_event, fila_assentos, fila_confirmacoes):
+    """
+    Reserva assentos entregues pelo alocador (versão C), sem disputar linhas no banco:
+    retira um assento da fila, simula o tempo da reserva e devolve a confirmação ao
+    alocador, que a persiste em lote. A reserva é confirmada ao agente antes do commit.
+    Continua até que o evento de parada seja sinalizado.
+    """
+    global all_attempts_per_reservation, all_latencies_per_reservation
+    while not stop_event.is_set():
+        inicio_reserva = time.time()
+        try:
+            escolhido = fila_assentos.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+        time.sleep(TEMPO_RESERVA) # Simula o tempo de duração da reserva
+        fila_confirmacoes.put((escolhido, time.time()))
+        print(f"[Agente-{id_agente}]: Reservado assento {escolhido} (Tentativas: 1)")
+        with metrics_lock:
+            all_attempts_per_reservation.append(1) # O alocador garante o assento na primeira tentativa
+            all_latencies_per_reservation.append(time.time() - inicio_reserva)
 
 # --- Gerenciador de Threads para Experimentos de Reserva ---
-def executar_reservas(versao, num_agentes, isolation_level):
+def executar_reservas(versao, num_agentes, isolation_level, usar_replica=False, coletar_armazenamento=True):
     """
     Cria e gerencia threads de agentes para reservar assentos até que não haja mais.
     Coleta o tempo total de execução e métricas de tentativas e conflitos.
+    Com coletar_armazenamento=False, não lê pg_stat_user_tables (evita duas conexões extras e
+    a espera de 1s pelo coletor de estatísticas); as métricas de armazenamento ficam None.
+    Com usar_replica=True, as consultas de disponibilidade são roteadas para as réplicas
+    de DB_CONFIG_REPLICAS e o atraso de replicação observado é incluído nas métricas.
     """
-    global total_deadlocks, total_rollbacks, all_attempts_per_reservation
+    global total_deadlocks, total_rollbacks, total_conflitos_leitura, all_attempts_per_reservation, all_latencies_per_reservation, all_replication_lags, all_replication_lag_bytes
+    global total_lotes_persistidos, max_reservas_pendentes, total_reservas_perdidas, all_persist_latencies
+    global falhas_replica_consecutivas, replica_indisponivel
+
+    if versao == "C" and usar_replica:
+        raise ValueError("A versão C lê os assentos livres pelo alocador no primário; não use usar_replica.")
     
     # Resetar métricas globais para cada nova execução
     with metrics_lock:
         total_deadlocks = 0
         total_rollbacks = 0
+        total_conflitos_leitura = 0
         all_attempts_per_reservation = []
-
-    print(f"\n--- Iniciando reservas versão {versao} com {num_agentes} agentes (Isolamento: {isolation_level}) ---")
+        all_latencies_per_reservation = []
+        all_replication_lags = []
+        all_replication_lag_bytes = []
+        total_lotes_persistidos = 0
+        max_reservas_pendentes = 0
+        total_reservas_perdidas = 0
+        all_persist_latencies = []
+        falhas_replica_consecutivas = 0
+        replica_indisponivel = False
+
+    leitura = "replica" if usar_replica else "primario"
+    if usar_replica:
+        # Garante que as réplicas já refletem o reset dos assentos feito antes desta execução;
+        # rodar a célula com réplicas desatualizadas mediria o estado da célula anterior
+        atrasadas = aguardar_sincronizacao_replicas()
+        if atrasadas:
+            raise RuntimeError(f"Réplicas não sincronizadas: {', '.join(atrasadas)}.")
+
+    print(f"\n--- Iniciando reservas versão {versao} com {num_agentes} agentes (Isolamento: {isolation_level}, Leitura: {leitura}, Perfil: {PERFIL_ATIVO['rotulo']}) ---")
     agentes = []
     stop_event = threading.Event() 
     
-    reservar_assento_func = reservar_assento_versao_a if versao == "A" else reservar_assento_versao_b
+    if versao == "C":
+        # O alocador é a única thread que acessa o banco; os agentes só usam as filas
+        fila_assentos = queue.Queue()
+        fila_confirmacoes = queue.Queue()
+        fim_agentes_event = threading.Event()
+        alocador = threading.Thread(target=alocador_assentos, args=(stop_event, fim_agentes_event, fila_assentos, fila_confirmacoes, isolation_level))
+        reservar_assento_func = reservar_assento_versao_c
+    else:
+        reservar_assento_func = reservar_assento_versao_a if versao == "A" else reservar_assento_versao_b
+
+    # Estatísticas de armazenamento antes da execução, para calcular os efeitos desta célula
+    stats_inicio = coletar_estatisticas_assentos() if coletar_armazenamento else None
 
     start_time = time.time()
+    if versao == "C":
+        alocador.start()
     for i in range(num_agentes):
         id_agente = i + 1
-        t = threading.Thread(target=reservar_assento_func, args=(id_agente, stop_event, isolation_level))
+        if versao == "C":
+            args = (id_agente, stop_event, fila_assentos, fila_confirmacoes)
+        else:
+            args = (id_agente, stop_event, isolation_level, usar_replica)
+        t = threading.Thread(target=reservar_assento_func, args=args)
         agentes.append(t)
         t.start()
 
     for agente in agentes:
         agente.join()
+    if replica_indisponivel:
+        # Os agentes pararam porque as réplicas deixaram de responder: a célula está incompleta
+        raise RuntimeError("Célula interrompida: réplica indisponível.")
+    if versao == "C":
+        # Só termina depois que o alocador persistir as últimas reservas
+        fim_agentes_event.set()
+        alocador.join()
+        # Se o alocador desistiu, as confirmações enviadas depois disso nunca foram persistidas
+        perdidas = 0
+        try:
+            while True:
+                fila_confirmacoes.get_nowait()
+                perdidas += 1
+        except queue.Empty:
+            pass
+        if perdidas:
+            print(f"[Alocador]: {perdidas} reserva(s) confirmada(s) após a parada do alocador não foram persistidas.")
+            with metrics_lock:
+                total_reservas_perdidas += perdidas
     end_time = time.time()
     duration = end_time - start_time
 
     print(f"--- Reservas versão {versao} finalizadas (Isolamento: {isolation_level}) ---")
     print(f"Duração total: {duration:.2f} segundos")
+
+    armazenamento = {'n_dead_tup': None, 'updates': None, 'hot_updates': None, 'hot_ratio': None}
+    stats_fim = None
+    if stats_inicio is not None:
+        # O coletor de estatísticas do PostgreSQL é assíncrono: aguarda um pouco para que os
+        # contadores das conexões dos agentes (já encerradas) sejam consolidados.
+        time.sleep(1)
+        stats_fim = coletar_estatisticas_assentos()
+    if stats_inicio is not None and stats_fim is not None:
+        updates = stats_fim['n_tup_upd'] - stats_inicio['n_tup_upd']
+        hot_updates = stats_fim['n_tup_hot_upd'] - stats_inicio['n_tup_hot_upd']
+        armazenamento = {
+            'n_dead_tup': stats_fim['n_dead_tup'],
+            'updates': updates,
+            'hot_updates': hot_updates,
+            'hot_ratio': hot_updates / updates if updates > 0 else None
+        }
     
     # Retorna as métricas para o bloco principal coletar
     return {
+        'perfil': PERFIL_ATIVO['rotulo'],
+        'perfil_config': PERFIL_ATIVO['assinatura'],
         'versao': versao,
         'agentes': num_agentes,
         'isolamento': isolation_level,
+        'leitura': leitura,
         'duracao': duration,
         'deadlocks': total_deadlocks,
         'rollbacks': total_rollbacks,
-        'tentativas_por_reserva': list(all_attempts_per_reservation) # Copia a lista
+        'conflitos_leitura': total_conflitos_leitura,
+        'lag_medio': sum(all_replication_lags) / len(all_replication_lags) if all_replication_lags else None,
+        'lag_max': max(all_replication_lags) if all_replication_lags else None,
+        'lag_bytes_medio': sum(all_replication_lag_bytes) / len(all_replication_lag_bytes) if all_replication_lag_bytes else None,
+        'lag_bytes_max': max(all_replication_lag_bytes) if all_replication_lag_bytes else None,
+        'lotes_persistidos': total_lotes_persistidos,
+        'max_pendentes': max_reservas_pendentes,
+        'reservas_perdidas': total_reservas_perdidas,
+        'latencia_persistencia_media': sum(all_persist_latencies) / len(all_persist_latencies) if all_persist_latencies else None,
+        'latencia_persistencia_max': max(all_persist_latencies) if all_persist_latencies else None,
+        'tentativas_por_reserva': list(all_attempts_per_reservation), # Copia a lista
+        'latencias_por_reserva': list(all_latencies_per_reservation),
+        **armazenamento
     }
 
 # --- Funções para Experimentos de Anomalias de Concorrência (Tarefa 7) ---
@@ -569,12 +1244,36 @@ def t2_dirty_read(t1_start, t1_continue, t2_start, t2_continue, isolation_level)
         if conn: conn.close()
 
 
+def resumo_roteamento(metrics):
+    """
+    Resume as métricas de uma execução para a comparação entre leitura no primário e nas réplicas.
+    """
+    tentativas = metrics['tentativas_por_reserva']
+    return {
+        'perfil': metrics['perfil'],
+        'perfil_config': metrics['perfil_config'],
+        'versao': metrics['versao'],
+        'agentes': metrics['agentes'],
+        'isolamento': metrics['isolamento'],
+        'leitura': metrics['leitura'],
+        'duracao': metrics['duracao'],
+        'rollbacks': metrics['rollbacks'],
+        'conflitos_leitura': metrics['conflitos_leitura'],
+        'tentativas_media': sum(tentativas) / len(tentativas) if tentativas else None,
+        'tentativas_max': max(tentativas) if tentativas else None,
+        'lag_medio': metrics['lag_medio'],
+        'lag_max': metrics['lag_max'],
+        'lag_bytes_medio': metrics['lag_bytes_medio'],
+        'lag_bytes_max': metrics['lag_bytes_max']
+    }
+
 # --- Bloco Principal de Execução ---
 if __name__ == "__main__":
     # --- Configuração Inicial do Ambiente ---
     print("--- Verificando e configurando o ambiente do banco de dados ---")
+    print(f"Perfil de implantação: {PERFIL_ATIVO['rotulo']} [{PERFIL_ATIVO['assinatura']}] (servidor: {PERFIL_ATIVO['servidor']}, cliente: {PERFIL_ATIVO['cliente']})")
     if criar_banco_oficina4():
-        if criar_tabela_assentos():
+        if criar_tabela_assentos(**CONFIG_TABELA_ASSENTOS):
             inicializar_assentos() # Popula a tabela com 200 assentos
         else:
             print("Não foi possível criar a tabela 'Assentos'. Abortando testes.")
@@ -588,10 +1287,13 @@ if __name__ == "__main__":
     results_tentativas = []
     results_conflitos = []
     results_ordem_assentos = [] # Para armazenar as ordens finais dos assentos
+    results_armazenamento = [] # Tuplas mortas e HOT updates por célula
+    results_roteamento = [] # Conflitos e atraso de replicação por destino da leitura
+    results_alocador = [] # Trade-off de durabilidade da versão C
 
     k_values = [1, 2, 4, 6, 8, 10]
     isolation_levels = ["read committed", "serializable"]
-    versions = ["A", "B"]
+    versions = ["A", "B", "C"] # C: alocador em processo com persistência em lote
 
     # --- Tarefas 1 a 5: Experimentos de Reserva e Coleta de Métricas ---
     print("\n--- Iniciando os testes de reserva (Tarefas 1-5) ---")
@@ -603,21 +1305,53 @@ if __name__ == "__main__":
                 # Executar as reservas e coletar as métricas
                 metrics = executar_reservas(versao=ver, num_agentes=k, isolation_level=iso_level)
                 results_tempo.append({
+                    'perfil': metrics['perfil'],
+                    'perfil_config': metrics['perfil_config'],
                     'versao': metrics['versao'],
                     'agentes': metrics['agentes'],
                     'isolamento': metrics['isolamento'],
                     'duracao': metrics['duracao']
                 })
                 results_conflitos.append({
+                    'perfil': metrics['perfil'],
+                    'perfil_config': metrics['perfil_config'],
                     'versao': metrics['versao'],
                     'agentes': metrics['agentes'],
                     'isolamento': metrics['isolamento'],
                     'deadlocks': metrics['deadlocks'],
                     'rollbacks': metrics['rollbacks']
                 })
+                results_armazenamento.append({
+                    'perfil': metrics['perfil'],
+                    'perfil_config': metrics['perfil_config'],
+                    'versao': metrics['versao'],
+                    'agentes': metrics['agentes'],
+                    'isolamento': metrics['isolamento'],
+                    'duracao': metrics['duracao'],
+                    'n_dead_tup': metrics['n_dead_tup'],
+                    'updates': metrics['updates'],
+                    'hot_updates': metrics['hot_updates'],
+                    'hot_ratio': metrics['hot_ratio']
+                })
+                results_roteamento.append(resumo_roteamento(metrics))
+                if ver == "C":
+                    results_alocador.append({
+                        'perfil': metrics['perfil'],
+                        'perfil_config': metrics['perfil_config'],
+                        'agentes': metrics['agentes'],
+                        'isolamento': metrics['isolamento'],
+                        'duracao': metrics['duracao'],
+                        'lotes_persistidos': metrics['lotes_persistidos'],
+                        'max_pendentes': metrics['max_pendentes'],
+                        'reservas_perdidas': metrics['reservas_perdidas'],
+                        'latencia_persistencia_media': metrics['latencia_persistencia_media'],
+                        'latencia_persistencia_max': metrics['latencia_persistencia_max']
+                    })
                 # Armazena as tentativas para cálculo posterior (min/max/avg)
                 for attempt_count in metrics['tentativas_por_reserva']:
                     results_tentativas.append({
+                        'perfil': metrics['perfil'],
+                        'perfil_config': metrics['perfil_config'],
                         'versao': metrics['versao'],
                         'agentes': metrics['agentes'],
                         'isolamento': metrics['isolamento'],
@@ -629,7 +1363,7 @@ if __name__ == "__main__":
                     for run_num in range(1, 3): # 3 execuções para cada cenário
                         limpar_assentos() # Limpar antes de cada uma das 3 execuções
                         print(f"\n--- Coletando ordem final: Versão {ver}, k={k}, Isolamento: {iso_level}, Execução {run_num} ---")
-                        executar_reservas(versao=ver, num_agentes=k, isolation_level=iso_level)
+                        executar_reservas(versao=ver, num_agentes=k, isolation_level=iso_level, coletar_armazenamento=False)
                         
                         conn_check = get_conexao_db(DB_CONFIG_OFICINA4)
                         cur_check = conn_check.cursor()
@@ -660,6 +1394,25 @@ if __name__ == "__main__":
                         'ordem_final': final_order
                     })
 
+    # --- Roteamento de Leituras para Réplicas ---
+    # Repete a matriz com a consulta de disponibilidade indo para as réplicas, para comparar
+    # conflitos e tentativas com as execuções acima (leitura no primário).
+    if DB_CONFIG_REPLICAS:
+        print("\n--- Iniciando os testes de reserva com leitura nas réplicas ---")
+        for iso_level in isolation_levels:
+            for ver in versions:
+                if ver == "C": # O alocador não faz consultas de disponibilidade pelos agentes
+                    continue
+                for k in k_values:
+                    limpar_assentos()
+                    try:
+                        metrics = executar_reservas(versao=ver, num_agentes=k, isolation_level=iso_level, usar_replica=True)
+                    except (RuntimeError, psycopg2.Error) as e:
+                        # Réplica atrasada, inacessível ou mal configurada: descarta só esta célula
+                        print(f"Célula Versão={ver}, k={k}, Isolamento={iso_level} ignorada: {e}")
+                        continue
+                    results_roteamento.append(resumo_roteamento(metrics))
+
     # --- Tarefa 7: Demonstração de Anomalias de Concorrência ---
     print("\n--- Iniciando Experimentos de Anomalias de Concorrência (Tarefa 7) ---")
     
@@ -715,7 +1468,7 @@ if __name__ == "__main__":
     print("\n--- Tabela de Tentativas por Reserva (Tarefa 3) ---")
     df_tentativas = pd.DataFrame(results_tentativas)
     # Agrupar por versão, agentes e isolamento para calcular min, max, avg
-    summary_tentativas = df_tentativas.groupby(['versao', 'agentes', 'isolamento'])['tentativas'].agg(['min', 'max', 'mean']).reset_index()
+    summary_tentativas = df_tentativas.groupby(['perfil', 'perfil_config', 'versao', 'agentes', 'isolamento'])['tentativas'].agg(['min', 'max', 'mean']).reset_index()
     summary_tentativas.rename(columns={'mean': 'media'}, inplace=True)
     print(summary_tentativas.to_string())
 
@@ -723,10 +1476,28 @@ if __name__ == "__main__":
     print("\n--- Resumo de Deadlocks e Rollbacks (Tarefa 5) ---")
     df_conflitos = pd.DataFrame(results_conflitos)
     # Somar deadlocks e rollbacks por grupo
-    summary_conflitos = df_conflitos.groupby(['versao', 'agentes', 'isolamento'])[['deadlocks', 'rollbacks']].sum().reset_index()
+    summary_conflitos = df_conflitos.groupby(['perfil', 'perfil_config', 'versao', 'agentes', 'isolamento'])[['deadlocks', 'rollbacks']].sum().reset_index()
     print(summary_conflitos.to_string())
     print("\nIndicação de como os erros foram tratados no código: Deadlocks e outros erros de psycopg2 são capturados com `try...except` e resultam em `conn.rollback()`. A thread então retenta a operação. Mensagens de log são impressas para cada ocorrência.")
 
+    # Efeitos de armazenamento: tuplas mortas e proporção de HOT updates por célula
+    print("\n--- Armazenamento da Tabela 'Assentos' (n_dead_tup e HOT updates) ---")
+    print(f"Configuração da tabela: {CONFIG_TABELA_ASSENTOS}")
+    df_armazenamento = pd.DataFrame(results_armazenamento)
+    print(df_armazenamento.to_string())
+
+    # Versão C: durabilidade das reservas confirmadas antes do commit em lote
+    print("\n--- Alocador de Assentos (Versão C): Persistência em Lote ---")
+    print(f"Tamanho do lote: {TAMANHO_LOTE_ALOCADOR}, intervalo máximo de persistência: {INTERVALO_PERSISTENCIA}s")
+    df_alocador = pd.DataFrame(results_alocador)
+    print(df_alocador.to_string())
+
+    # Roteamento de leituras: efeito do atraso de replicação nos conflitos e nas tentativas
+    if DB_CONFIG_REPLICAS:
+        print("\n--- Leitura no Primário x Leitura nas Réplicas ---")
+        df_roteamento = pd.DataFrame(results_roteamento).sort_values(['isolamento', 'versao', 'agentes', 'leitura'])
+        print(df_roteamento.to_string(index=False))
+
     # Tarefa 6: Avaliação de Variação na Ordem de Alocação de Assentos
     print("\n--- Variação na Ordem de Alocação de Assentos (Tarefa 6) ---")
     df_ordem = pd.DataFrame(results_ordem_assentos)